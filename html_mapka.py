@@ -5,6 +5,7 @@ import requests
 import pandas as pd
 import json
 import statistics
+import hydro_binlog
 
 # URL API hydro2
 API_URL = "https://danepubliczne.imgw.pl/api/data/hydro2"
@@ -49,12 +50,15 @@ def refresh_and_save_data():
     return None
 
 def generate_html_from_csv(csv_file=CSV_FILE, output_file='hydro_table.html'):
-    # 1) Wczytaj dane CSV
+    # 1) Wczytaj dane CSV (lub aktualny stan stacji z logu binarnego *.bin)
     data = []
-    with open(csv_file, mode='r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f, delimiter=';')
-        for r in reader:
-            data.append({k: (v if v != '' else None) for k, v in r.items()})
+    if csv_file.endswith('.bin'):
+        data = hydro_binlog.read_latest_rows(csv_file)
+    else:
+        with open(csv_file, mode='r', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f, delimiter=';')
+            for r in reader:
+                data.append({k: (v if v != '' else None) for k, v in r.items()})
 
     # 2) Klasyfikacja
     alarm_state, warning_state, normal_state = classify_water_levels(data)
@@ -0,0 +1,199 @@
+import calendar
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Plik z rekordami (append-only, stała szerokość rekordu)
+BINLOG_FILE = 'hydro_data.bin'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Układ rekordu: 4 + 8 + 4 + 4 = 20 bajtów, little-endian, bez paddingu
+RECORD_DTYPE = np.dtype([
+    ('station', '<u4'),
+    ('timestamp', '<i8'),
+    ('stan', '<f4'),
+    ('przeplyw', '<f4'),
+])
+
+
+def stations_path(binlog_file):
+    """Słownik stacji leży obok logu: hydro_data.bin -> hydro_data.json"""
+    return os.path.splitext(binlog_file)[0] + '.json'
+
+
+# Słownik stacji - indeks w pliku binarnym -> metadane stacji
+STATIONS_FILE = stations_path(BINLOG_FILE)
+
+
+def load_stations(stations_file=STATIONS_FILE):
+    """Wczytuje słownik stacji (lista, pozycja = indeks stacji w logu)"""
+    if not os.path.exists(stations_file):
+        return []
+    with open(stations_file, mode='r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_stations(stations, stations_file=STATIONS_FILE):
+    """Zapisuje słownik stacji atomowo (plik tymczasowy + os.replace)"""
+    tmp_file = stations_file + '.tmp'
+    with open(tmp_file, mode='w', encoding='utf-8') as f:
+        json.dump(stations, f, ensure_ascii=False)
+    os.replace(tmp_file, stations_file)
+
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, '') else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_epoch(value):
+    # Czas IMGW zapisywany jak jest (jako UTC) - plik nie zależy od strefy procesu
+    try:
+        return calendar.timegm(datetime.strptime(value, DATE_FORMAT).timetuple())
+    except (TypeError, ValueError):
+        return None
+
+
+def _from_epoch(value):
+    return datetime.fromtimestamp(value, timezone.utc).strftime(DATE_FORMAT)
+
+
+def _format_value(value):
+    # Najkrótszy zapis float32 - '520', '1.1' jak w pliku CSV, a nie 1.100000023841858
+    if np.isnan(value):
+        return None
+    return np.format_float_positional(np.float32(value), trim='-')
+
+
+def append_readings(data, binlog_file=BINLOG_FILE, stations_file=None):
+    """Dopisuje rekordy z API hydro2 na koniec logu binarnego.
+
+    Znacznik czasu to moment pomiaru ('stan_data'); rekordy bez niego są
+    pomijane. Brakujące 'stan' / 'przeplyw' zapisywane są jako NaN.
+    """
+    if not data:
+        return 0
+
+    stations_file = stations_file or stations_path(binlog_file)
+    stations = load_stations(stations_file)
+    index = {s['kod_stacji']: i for i, s in enumerate(stations)}
+    stations_changed = False
+
+    records = []
+    for record in data:
+        timestamp = _to_epoch(record.get('stan_data'))
+        if timestamp is None:
+            continue
+        code = record.get('kod_stacji')
+        if code not in index:
+            index[code] = len(stations)
+            stations.append({
+                'kod_stacji': code,
+                'nazwa_stacji': record.get('nazwa_stacji'),
+                'lon': record.get('lon'),
+                'lat': record.get('lat'),
+            })
+            stations_changed = True
+        # W API pole nazywa się 'przelyw', w CSV już 'przeplyw'
+        flow = record.get('przelyw', record.get('przeplyw'))
+        records.append((index[code], timestamp, _to_float(record.get('stan')), _to_float(flow)))
+    records = np.array(records, dtype=RECORD_DTYPE)
+
+    # Słownik najpierw - rekord nigdy nie wskazuje na nieznaną stację
+    if stations_changed:
+        save_stations(stations, stations_file)
+    with open(binlog_file, mode='ab') as f:
+        # Odcięcie niepełnego rekordu po przerwanym zapisie - inaczej kolejne
+        # rekordy byłyby przesunięte względem granic RECORD_DTYPE
+        size = f.seek(0, os.SEEK_END)
+        f.truncate(size // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize)
+        f.write(records.tobytes())
+    return len(records)
+
+
+def open_binlog(binlog_file=BINLOG_FILE):
+    """Zwraca widok tylko-do-odczytu (np.memmap) na wszystkie rekordy logu.
+
+    Niepełny rekord na końcu pliku (przerwany zapis) jest pomijany.
+    """
+    if not os.path.exists(binlog_file):
+        return np.empty(0, dtype=RECORD_DTYPE)
+    count = os.path.getsize(binlog_file) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(binlog_file, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+
+
+def latest_per_station(records):
+    """Zwraca ostatni (najnowszy) rekord dla każdej stacji.
+
+    Rekord z brakującym 'stan' nie przesłania wcześniejszego poprawnego odczytu.
+    """
+    if len(records) == 0:
+        return records[:0]
+    # Sortowanie po (stacja, jest stan, czas) - ostatni w grupie to najnowszy poprawny
+    has_level = ~np.isnan(records['stan'])
+    order = np.lexsort((records['timestamp'], has_level, records['station']))
+    stations = records['station'][order]
+    last = np.flatnonzero(np.append(stations[1:] != stations[:-1], True))
+    return records[order[last]]
+
+
+def level_stats(records):
+    """Statystyki poziomu wody w formacie używanym w raporcie HTML"""
+    levels = records['stan']
+    levels = levels[~np.isnan(levels)]
+    if levels.size == 0:
+        return {
+            'Liczba pomiarów': 0,
+            'Min': '-',
+            'Max': '-',
+            'Średnia': '-',
+            'Mediana': '-'
+        }
+    # Akumulacja w float64, żeby suma milionów float32 nie traciła precyzji
+    return {
+        'Liczba pomiarów': int(levels.size),
+        'Min': f"{levels.min():.2f}",
+        'Max': f"{levels.max():.2f}",
+        'Średnia': f"{levels.mean(dtype=np.float64):.2f}",
+        'Mediana': f"{np.median(levels):.2f}"
+    }
+
+
+def records_to_rows(records, stations):
+    """Zamienia rekordy binarne na wiersze w formacie pliku CSV"""
+    rows = []
+    for station, timestamp, stan, przeplyw in records.tolist():
+        meta = stations[station]
+        measured = _from_epoch(timestamp)
+        rows.append({
+            'kod_stacji': meta['kod_stacji'],
+            'nazwa_stacji': meta['nazwa_stacji'],
+            'lon': meta['lon'],
+            'lat': meta['lat'],
+            'stan': _format_value(stan),
+            'stan_data': measured,
+            'przeplyw': _format_value(przeplyw),
+            'przeplyw_data': None,
+            'timestamp': measured
+        })
+    return rows
+
+
+def read_latest_rows(binlog_file=BINLOG_FILE, stations_file=None):
+    """Aktualny stan każdej stacji jako wiersze zgodne z CSV"""
+    records = latest_per_station(open_binlog(binlog_file))
+    stations = load_stations(stations_file or stations_path(binlog_file))
+    return records_to_rows(records, stations)
+
+
+if __name__ == '__main__':
+    records = open_binlog()
+    print(f"📦 Rekordów w logu: {len(records)}")
+    for k, v in level_stats(records).items():
+        print(f"{k}: {v}")
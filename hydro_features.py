@@ -0,0 +1,416 @@
+import json
+import os
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from kafka import ConsumerRebalanceListener, KafkaConsumer, TopicPartition
+from kafka.errors import NoBrokersAvailable
+
+KAFKA_BOOTSTRAP_SERVERS = '172.18.0.3:9092'
+HYDRO_TOPIC = 'imgw-hydro-data'
+METEO_TOPIC = 'imgw-meteo-data'
+GEOJSON_FILE = 'poland.geojson'
+# Eksport macierzy cech - format wg rozszerzenia (.npz lub .parquet)
+FEATURES_FILE = 'hydro_features.npz'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Okna czasowe [s]
+WINDOWS = {'1h': 3600, '6h': 6 * 3600, '24h': 24 * 3600}
+# Pojemność bufora na serię - >24h przy odczytach co 10 min
+RING_SIZE = 192
+# Seria bez odczytu dłużej niż najdłuższe okno nie wchodzi do agregatów regionów
+STALE_AFTER = max(WINDOWS.values())
+# Maks. odległość [°] od konturu województwa dla punktów tuż poza zgrubnymi granicami
+REGION_TOLERANCE = 0.1
+
+STATION_FEATURES = ['stan'] + [
+    f'{name}_{w}' for w in WINDOWS for name in ('delta', 'max', 'mean')
+] + [f'opad_{w}' for w in WINDOWS]
+REGION_FEATURES = ['liczba_stacji', 'stan_mean', 'stan_max'] + [
+    f'delta_{w}_{agg}' for w in WINDOWS for agg in ('mean', 'max')
+] + [f'opad_{w}' for w in WINDOWS]
+
+
+def parse_timestamp(value):
+    try:
+        return int(datetime.strptime(value, DATE_FORMAT).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def to_float(value):
+    try:
+        return float(value) if value not in (None, '') else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def load_regions(geojson_file=GEOJSON_FILE):
+    """Wczytuje wielokąty województw jako listę (nazwa, bbox, pierścienie)"""
+    with open(geojson_file, 'r', encoding='utf-8') as gf:
+        boundary = json.load(gf)
+    regions = []
+    for feature in boundary['features']:
+        geometry = feature['geometry']
+        polygons = geometry['coordinates']
+        if geometry['type'] == 'Polygon':
+            polygons = [polygons]
+        rings = [np.asarray(ring, dtype=float) for polygon in polygons for ring in polygon]
+        points = np.vstack(rings)
+        bbox = (*points.min(axis=0), *points.max(axis=0))
+        regions.append((feature['properties']['name'], bbox, rings))
+    return regions
+
+
+def point_in_rings(lon, lat, rings):
+    # Ray casting (reguła parzystości) - dziury i wiele wielokątów obsłużone naturalnie
+    inside = False
+    for ring in rings:
+        x1, y1 = ring[:-1, 0], ring[:-1, 1]
+        x2, y2 = ring[1:, 0], ring[1:, 1]
+        crosses = (y1 > lat) != (y2 > lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= bool(np.count_nonzero(crosses & (lon < x_cross)) % 2)
+    return inside
+
+
+def find_region(lon, lat, regions):
+    """Indeks województwa zawierającego punkt (lub najbliższego w granicy tolerancji) albo -1"""
+    if np.isnan(lon) or np.isnan(lat):
+        return -1
+    for i, (_, (min_lon, min_lat, max_lon, max_lat), rings) in enumerate(regions):
+        if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat and point_in_rings(lon, lat, rings):
+            return i
+    # Zgrubne kontury w poland.geojson gubią punkty na wybrzeżu i granicy (np. Hel)
+    distances = [
+        min(np.hypot(ring[:, 0] - lon, ring[:, 1] - lat).min() for ring in rings)
+        for _, _, rings in regions
+    ]
+    nearest = int(np.argmin(distances))
+    return nearest if distances[nearest] <= REGION_TOLERANCE else -1
+
+
+class RingBuffers:
+    """Bufory cykliczne (czas, wartość) o stałej pojemności dla wielu serii"""
+
+    def __init__(self, capacity=RING_SIZE):
+        self.capacity = capacity
+        self.times = np.empty((0, capacity), dtype=np.int64)
+        self.values = np.empty((0, capacity), dtype=np.float32)
+        self.head = np.empty(0, dtype=np.int64)
+        self.last = np.empty(0, dtype=np.int64)
+
+    def add_series(self):
+        empty = np.iinfo(np.int64).min
+        self.times = np.vstack([self.times, np.full((1, self.capacity), empty, dtype=np.int64)])
+        self.values = np.vstack([self.values, np.full((1, self.capacity), np.nan, dtype=np.float32)])
+        self.head = np.append(self.head, 0)
+        self.last = np.append(self.last, empty)
+        return len(self.head) - 1
+
+    def push(self, i, timestamp, value):
+        """Dopisuje odczyt; zwraca False dla odczytu już znanego lub starszego"""
+        if timestamp <= self.last[i]:
+            return False
+        self.times[i, self.head[i]] = timestamp
+        self.values[i, self.head[i]] = value
+        self.head[i] = (self.head[i] + 1) % self.capacity
+        self.last[i] = timestamp
+        return True
+
+    def window(self, i, seconds):
+        """Odczyty z ostatnich `seconds` sekund serii, posortowane po czasie"""
+        times = self.times[i]
+        mask = times >= self.last[i] - seconds
+        order = np.argsort(times[mask])
+        return self.values[i][mask][order]
+
+
+class FeatureStore:
+    """Kroczące cechy stacji hydro i województw aktualizowane przyrostowo.
+
+    Macierze `station_matrix` i `region_matrix` są zawsze aktualne, więc
+    odczyt cech stacji lub regionu to pojedyncze indeksowanie (O(1)).
+    """
+
+    def __init__(self, geojson_file=GEOJSON_FILE):
+        self.regions = load_regions(geojson_file)
+        self.region_index = {name: i for i, (name, _, _) in enumerate(self.regions)}
+        self.region_matrix = np.full((len(self.regions), len(REGION_FEATURES)), np.nan)
+
+        self.stations = {}
+        self.station_codes = []
+        self.station_regions = []
+        self.station_matrix = np.empty((0, len(STATION_FEATURES)))
+        self.levels = RingBuffers()
+
+        self.rain_stations = {}
+        self.rain_regions = []
+        self.rain_sums = np.empty((0, len(WINDOWS)))
+        self.rain = RingBuffers()
+        # Najnowszy znany znacznik czasu - odniesienie dla serii nieaktualnych
+        self.now = 0
+
+    def _region(self, record):
+        region = find_region(to_float(record.get('lon')), to_float(record.get('lat')), self.regions)
+        if region < 0:
+            print(f"⚠️ Stacja {record.get('kod_stacji')} poza województwami - pominięta w agregatach.")
+        return region
+
+    def _station(self, record):
+        code = record.get('kod_stacji')
+        if code not in self.stations:
+            self.stations[code] = self.levels.add_series()
+            self.station_codes.append(code)
+            self.station_regions.append(self._region(record))
+            row = np.full((1, len(STATION_FEATURES)), np.nan)
+            self.station_matrix = np.vstack([self.station_matrix, row])
+        return self.stations[code]
+
+    def _rain_station(self, record):
+        code = record.get('kod_stacji')
+        if code not in self.rain_stations:
+            self.rain_stations[code] = self.rain.add_series()
+            self.rain_regions.append(self._region(record))
+            self.rain_sums = np.vstack([self.rain_sums, np.full((1, len(WINDOWS)), np.nan)])
+        return self.rain_stations[code]
+
+    def _update_station(self, i):
+        row = [self.levels.values[i, self.levels.head[i] - 1]]
+        for seconds in WINDOWS.values():
+            window = self.levels.window(i, seconds)
+            row += [window[-1] - window[0], window.max(), window.mean(dtype=np.float64)]
+        self.station_matrix[i, :len(row)] = row
+
+    def _update_regions(self):
+        # Serie bez odczytu w ostatnich STALE_AFTER s (względem najnowszego odczytu) są pomijane
+        cutoff = self.now - STALE_AFTER
+        station_regions = np.asarray(self.station_regions, dtype=np.int64)
+        active_stations = np.where(self.levels.last >= cutoff, station_regions, -1)
+        active_rain = np.where(self.rain.last >= cutoff, np.asarray(self.rain_regions, dtype=np.int64), -1)
+
+        for region in range(len(self.regions)):
+            rows = self.station_matrix[active_stations == region]
+            rain = self.rain_sums[active_rain == region]
+            values = [len(rows)]
+            # nanmean/nanmax na pustych kolumnach (same NaN) zwracają NaN z ostrzeżeniem
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                values += [np.nanmean(rows[:, 0]), np.nanmax(rows[:, 0])] if len(rows) else [np.nan, np.nan]
+                for w in WINDOWS:
+                    column = rows[:, STATION_FEATURES.index(f'delta_{w}')]
+                    values += [np.nanmean(column), np.nanmax(column)] if len(rows) else [np.nan, np.nan]
+                values += list(np.nanmean(rain, axis=0)) if len(rain) else [np.nan] * len(WINDOWS)
+            self.region_matrix[region] = values
+
+        # Złączenie odczytów stacji z opadami jej województwa
+        start = STATION_FEATURES.index('opad_1h')
+        known = station_regions >= 0
+        self.station_matrix[known, start:] = self.region_matrix[station_regions[known], -len(WINDOWS):]
+
+    def update_hydro(self, data):
+        """Aktualizuje cechy po wiadomości z topiku hydro; zwraca liczbę nowych odczytów"""
+        added = 0
+        for record in data:
+            level = to_float(record.get('stan'))
+            timestamp = parse_timestamp(record.get('stan_data'))
+            if np.isnan(level) or timestamp is None:
+                continue
+            i = self._station(record)
+            if self.levels.push(i, timestamp, level):
+                self._update_station(i)
+                self.now = max(self.now, timestamp)
+                added += 1
+        if added:
+            self._update_regions()
+        return added
+
+    def update_meteo(self, data):
+        """Aktualizuje sumy opadów po wiadomości z topiku meteo; zwraca liczbę nowych odczytów"""
+        added = 0
+        for record in data:
+            rain = to_float(record.get('opad_10min'))
+            timestamp = parse_timestamp(record.get('opad_10min_data'))
+            if np.isnan(rain) or timestamp is None:
+                continue
+            i = self._rain_station(record)
+            if self.rain.push(i, timestamp, rain):
+                self.rain_sums[i] = [self.rain.window(i, s).sum(dtype=np.float64) for s in WINDOWS.values()]
+                self.now = max(self.now, timestamp)
+                added += 1
+        if added:
+            self._update_regions()
+        return added
+
+    def station_features(self, code):
+        """Aktualne cechy stacji jako słownik (O(1))"""
+        return dict(zip(STATION_FEATURES, self.station_matrix[self.stations[code]].tolist()))
+
+    def region_features(self, name):
+        """Aktualne cechy województwa jako słownik (O(1))"""
+        return dict(zip(REGION_FEATURES, self.region_matrix[self.region_index[name]].tolist()))
+
+    def export(self, output_file=FEATURES_FILE):
+        """Zapisuje macierze cech do .npz (NumPy) lub .parquet.
+
+        Pliki podmieniane są atomowo (plik tymczasowy + os.replace), więc
+        czytelnik nie trafi na częściowy zapis. Eksport .parquet to para
+        plików (stacje, województwa) z tą samą wartością 'aktualizacja'.
+        """
+        region_names = [name for name, _, _ in self.regions]
+        if output_file.endswith('.parquet'):
+            regions_file = output_file.replace('.parquet', '_regions.parquet')
+            stations = pd.DataFrame(self.station_matrix, columns=STATION_FEATURES)
+            stations.insert(0, 'kod_stacji', self.station_codes)
+            stations.insert(1, 'wojewodztwo', [region_names[r] if r >= 0 else None for r in self.station_regions])
+            stations['aktualizacja'] = self.now
+            regions = pd.DataFrame(self.region_matrix, columns=REGION_FEATURES)
+            regions.insert(0, 'wojewodztwo', region_names)
+            regions['aktualizacja'] = self.now
+            # Najpierw oba pliki tymczasowe, dopiero potem podmiana pary
+            stations.to_parquet(output_file + '.tmp', index=False)
+            regions.to_parquet(regions_file + '.tmp', index=False)
+            os.replace(regions_file + '.tmp', regions_file)
+            os.replace(output_file + '.tmp', output_file)
+        else:
+            tmp_file = output_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                np.savez(
+                    f,
+                    aktualizacja=self.now,
+                    station_codes=np.asarray(self.station_codes, dtype=str),
+                    station_regions=np.asarray(self.station_regions),
+                    station_features=np.asarray(STATION_FEATURES),
+                    station_matrix=self.station_matrix,
+                    region_names=np.asarray(region_names),
+                    region_features=np.asarray(REGION_FEATURES),
+                    region_matrix=self.region_matrix,
+                )
+            os.replace(tmp_file, output_file)
+
+
+def wait_for_kafka(max_retries=5, delay=5):
+    for i in range(max_retries):
+        try:
+            consumer = KafkaConsumer(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS)
+            consumer.close()
+            return True
+        except NoBrokersAvailable:
+            print(f"⏳ Próba {i+1}/{max_retries} - Kafka niedostępna, czekam {delay}s...")
+            time.sleep(delay)
+    return False
+
+
+def seek_to_window(consumer, partitions, seconds=STALE_AFTER):
+    """Ustawia partycje na wiadomości z ostatnich `seconds` sekund.
+
+    Zwraca offset startowy każdej partycji albo None, gdy w oknie nie ma
+    wiadomości (partycja ustawiona na koniec).
+    """
+    start_ms = int((time.time() - seconds) * 1000)
+    offsets = consumer.offsets_for_times({tp: start_ms for tp in partitions})
+    starts = {}
+    for tp in partitions:
+        if offsets.get(tp) is None:
+            consumer.seek_to_end(tp)
+            starts[tp] = None
+        else:
+            consumer.seek(tp, offsets[tp].offset)
+            starts[tp] = offsets[tp].offset
+    return starts
+
+
+class WindowReplay(ConsumerRebalanceListener):
+    """Odtwarza ostatnie 24h z każdej nowo przydzielonej partycji.
+
+    Bufory żyją tylko w pamięci, więc offsety nie są zatwierdzane w Kafce.
+    Partycje już czytane przez ten proces wracają na zapamiętaną pozycję.
+    Topik utworzony później (np. przy pierwszej wysyłce producenta) trafia
+    do przydziału po odświeżeniu metadanych i też jest odtwarzany.
+    """
+
+    def __init__(self, consumer, seconds=STALE_AFTER):
+        self.consumer = consumer
+        self.seconds = seconds
+        self.positions = {}
+        # Offsety końcowe z chwili przydziału - do nich trwa odtwarzanie
+        self.replay_until = {}
+
+    def on_partitions_revoked(self, revoked):
+        for tp in revoked:
+            self.replay_until.pop(tp, None)
+
+    def on_partitions_assigned(self, assigned):
+        new = [tp for tp in assigned if tp not in self.positions]
+        for tp in assigned:
+            if tp in self.positions:
+                self.consumer.seek(tp, self.positions[tp])
+        if not new:
+            return
+        starts = seek_to_window(self.consumer, new, self.seconds)
+        end_offsets = self.consumer.end_offsets(new)
+        for tp, start in starts.items():
+            if start is not None and end_offsets[tp] > start:
+                self.replay_until[tp] = end_offsets[tp]
+        print(f"⏪ Odtwarzanie ostatnich {self.seconds // 3600}h: {len(self.replay_until)} partycji.")
+
+    def processed(self, message):
+        tp = TopicPartition(message.topic, message.partition)
+        self.positions[tp] = message.offset + 1
+        if tp in self.replay_until and message.offset + 1 >= self.replay_until[tp]:
+            del self.replay_until[tp]
+
+    @property
+    def replaying(self):
+        return bool(self.replay_until)
+
+
+def kafka_consumer():
+    if not wait_for_kafka():
+        print("❌ Nie udało się połączyć z brokerem Kafka.")
+        return
+
+    # Grupa tylko do przydziału partycji - pozycje ustawia WindowReplay
+    consumer = KafkaConsumer(
+        bootstrap_servers=[KAFKA_BOOTSTRAP_SERVERS],
+        group_id='imgw-feature-store',
+        enable_auto_commit=False,
+        value_deserializer=lambda x: json.loads(x.decode('utf-8'))
+    )
+    replay = WindowReplay(consumer)
+    consumer.subscribe([HYDRO_TOPIC, METEO_TOPIC], listener=replay)
+    store = FeatureStore()
+
+    print("📥 Magazyn cech uruchomiony – oczekiwanie na dane...")
+    for message in consumer:
+        try:
+            data = message.value
+            if not isinstance(data, list):
+                print("⚠️ Nieoczekiwany format danych:", type(data))
+                continue
+            if message.topic == HYDRO_TOPIC:
+                store.update_hydro(data)
+            else:
+                store.update_meteo(data)
+        except Exception as e:
+            print(f"❌ Błąd przetwarzania wiadomości: {e}")
+            continue
+        finally:
+            replay.processed(message)
+
+        # W trakcie odtwarzania macierze są niepełne - eksport dopiero po nim
+        if replay.replaying:
+            continue
+        try:
+            store.export()
+            print(f"🧮 Zaktualizowano cechy ({message.topic}, {len(data)} rekordów).")
+        except Exception as e:
+            print(f"❌ Błąd eksportu cech do {FEATURES_FILE}: {e}")
+
+
+if __name__ == '__main__':
+    kafka_consumer()
@@ -1,13 +1,101 @@
-
 import json
+import os
+import sys
 import requests
 import time
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from kafka import KafkaProducer
 from kafka.errors import NoBrokersAvailable
 
 KAFKA_BOOTSTRAP_SERVERS = '172.18.0.3:9092'
 HYDRO_TOPIC = 'imgw-hydro-data'
-API_URL = 'https://danepubliczne.imgw.pl/api/data/hydro2/'
+# Bazowy adres API - do testów można wskazać lokalny serwer (imgw_stub_server.py)
+API_BASE_URL = os.environ.get('IMGW_API_BASE_URL', 'https://danepubliczne.imgw.pl/api/data/')
+API_URL = API_BASE_URL + 'hydro2/'
+
+def to_float(value):
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+def normalize_hydro(record):
+    # Schemat hydro2 bez zmian - na nim opierają się istniejący konsumenci
+    return record
+
+def normalize_synop(record):
+    hour = int(record.get('godzina_pomiaru') or 0)
+    return {
+        'kod_stacji': record.get('id_stacji'),
+        'nazwa_stacji': record.get('stacja'),
+        'pomiar_data': f"{record.get('data_pomiaru')} {hour:02d}:00:00",
+        'temperatura': to_float(record.get('temperatura')),
+        'suma_opadu': to_float(record.get('suma_opadu')),
+        'wilgotnosc_wzgledna': to_float(record.get('wilgotnosc_wzgledna')),
+        'cisnienie': to_float(record.get('cisnienie')),
+    }
+
+def normalize_meteo(record):
+    return {
+        'kod_stacji': record.get('kod_stacji'),
+        'nazwa_stacji': record.get('nazwa_stacji'),
+        'lon': to_float(record.get('lon')),
+        'lat': to_float(record.get('lat')),
+        'opad_10min': to_float(record.get('opad_10min')),
+        'opad_10min_data': record.get('opad_10min_data'),
+    }
+
+def normalize_warning(record):
+    areas = record.get('obszary') or []
+    return {
+        'numer': record.get('numer'),
+        'stopien': record.get('stopien'),
+        'zdarzenie': record.get('zdarzenie'),
+        'data_od': record.get('data_od'),
+        'data_do': record.get('data_do'),
+        'prawdopodobienstwo': to_float(record.get('prawdopodobienstwo')),
+        'wojewodztwa': sorted({a.get('wojewodztwo') for a in areas if a.get('wojewodztwo')}),
+        'opis': record.get('przebieg'),
+    }
+
+# Rejestr źródeł: ścieżka endpointu (względem API_BASE_URL) -> topik,
+# normalizator schematu, interwał odpytywania [s]
+SOURCES = {
+    'hydro': {
+        'path': 'hydro2/',
+        'topic': HYDRO_TOPIC,
+        'normalize': normalize_hydro,
+        'interval': 600,
+    },
+    'synop': {
+        'path': 'synop/',
+        'topic': 'imgw-synop-data',
+        'normalize': normalize_synop,
+        'interval': 3600,
+    },
+    'meteo': {
+        'path': 'meteo/',
+        'topic': 'imgw-meteo-data',
+        'normalize': normalize_meteo,
+        'interval': 600,
+    },
+    'warnings': {
+        'path': 'warningshydro/',
+        'topic': 'imgw-hydro-warnings',
+        'normalize': normalize_warning,
+        'interval': 900,
+    },
+}
+
+def create_session():
+    # Wspólna pula połączeń - po jednym połączeniu keep-alive na każde źródło
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(SOURCES))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Accept'] = 'application/json'
+    return session
 
 def wait_for_kafka(max_retries=5, delay=5):
     for i in range(max_retries):
@@ -20,16 +108,49 @@ def wait_for_kafka(max_retries=5, delay=5):
             time.sleep(delay)
     return False
 
-def fetch_hydro_data():
+def fetch_json(session=requests, url=API_URL):
     try:
-        response = requests.get(API_URL, headers={'Accept': 'application/json'}, timeout=10)
+        response = session.get(url, headers={'Accept': 'application/json'}, timeout=10)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"❌ Błąd pobierania danych: {e}")
+        print(f"❌ Błąd pobierania danych z {url}: {e}")
         return None
 
-def kafka_producer():
+def fetch_source(session, name, base_url=API_BASE_URL):
+    source = SOURCES[name]
+    data = fetch_json(session, base_url + source['path'])
+    if not data:
+        return []
+    records = []
+    for record in data:
+        try:
+            records.append(source['normalize'](record))
+        except Exception as e:
+            print(f"⚠️ [{name}] Błąd normalizacji rekordu: {e}")
+    return records
+
+def fetch_sources(session, executor, names, base_url=API_BASE_URL):
+    # Równoległe pobieranie - cykl trwa tyle, co najwolniejszy endpoint
+    futures = {name: executor.submit(fetch_source, session, name, base_url) for name in names}
+    return {name: future.result() for name, future in futures.items()}
+
+def send_sources(producer, results):
+    for name, records in results.items():
+        if records:
+            topic = SOURCES[name]['topic']
+            producer.send(topic, value=records)
+            print(f"📤 Wysłano {len(records)} rekordów do topiku '{topic}'.")
+    producer.flush()
+
+def due_sources(next_poll, now):
+    # Zwraca źródła, których termin minął, i ustawia im kolejny termin
+    due = [name for name, t in next_poll.items() if t <= now]
+    for name in due:
+        next_poll[name] = now + SOURCES[name]['interval']
+    return due
+
+def kafka_producer(loop=False):
     if not wait_for_kafka():
         print("❌ Nie udało się połączyć z brokerem Kafka.")
         return
@@ -38,12 +159,24 @@ def kafka_producer():
         bootstrap_servers=[KAFKA_BOOTSTRAP_SERVERS],
         value_serializer=lambda v: json.dumps(v).encode('utf-8')
     )
+    session = create_session()
+
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as executor:
+        next_poll = {name: 0.0 for name in SOURCES}
+        while True:
+            due = due_sources(next_poll, time.monotonic())
+            try:
+                send_sources(producer, fetch_sources(session, executor, due))
+            except Exception as e:
+                # Błąd jednego cyklu (np. Kafka) nie może zatrzymać pollera
+                print(f"❌ Błąd cyklu odpytywania: {e}")
+            if not loop:
+                break
+            time.sleep(max(0.0, min(next_poll.values()) - time.monotonic()))
 
-    data = fetch_hydro_data()
-    if data:
-        producer.send(HYDRO_TOPIC, value=data)
-        producer.flush()
-        print(f"📤 Wysłano {len(data)} rekordów do topiku '{HYDRO_TOPIC}'.")
+    session.close()
+    producer.close()
 
 if __name__ == '__main__':
-    kafka_producer()
+    # python imgw_hydro_producer.py loop - ciągłe odpytywanie wg interwałów źródeł
+    kafka_producer(loop=len(sys.argv) > 1 and sys.argv[1] == 'loop')
@@ -0,0 +1,73 @@
+import json
+import sys
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Lokalny serwer z przykładowymi odpowiedziami API IMGW - do testów producenta:
+#   python imgw_stub_server.py 8000
+#   IMGW_API_BASE_URL=http://localhost:8000/api/data/ python imgw_hydro_producer.py
+PAYLOADS = {
+    '/api/data/hydro2/': [
+        {
+            'kod_stacji': '150160180', 'nazwa_stacji': 'Warszawa-Bulwary',
+            'lon': '21.0275', 'lat': '52.2406',
+            'stan': '210', 'stan_data': '2024-05-20 10:00:00',
+            'przelyw': '402.5', 'przeplyw_data': '2024-05-20 10:00:00'
+        },
+        {
+            'kod_stacji': '149180020', 'nazwa_stacji': 'Kraków-Bielany',
+            'lon': '19.8421', 'lat': '50.0397',
+            'stan': '465', 'stan_data': '2024-05-20 10:00:00',
+            'przelyw': None, 'przeplyw_data': None
+        }
+    ],
+    '/api/data/synop/': [
+        {
+            'id_stacji': '12375', 'stacja': 'Warszawa',
+            'data_pomiaru': '2024-05-20', 'godzina_pomiaru': '9',
+            'temperatura': '17.4', 'predkosc_wiatru': '3', 'kierunek_wiatru': '250',
+            'wilgotnosc_wzgledna': '71.2', 'suma_opadu': '2.1', 'cisnienie': '1008.3'
+        }
+    ],
+    '/api/data/meteo/': [
+        {
+            'kod_stacji': '252200150', 'nazwa_stacji': 'Warszawa-Okęcie',
+            'lon': '20.9608', 'lat': '52.1628',
+            'opad_10min': '0.4', 'opad_10min_data': '2024-05-20 09:50:00'
+        }
+    ],
+    '/api/data/warningshydro/': [
+        {
+            'numer': '12', 'opublikowano': '2024-05-20 08:00:00',
+            'data_od': '2024-05-20 10:00:00', 'data_do': '2024-05-22 10:00:00',
+            'prawdopodobienstwo': '80', 'zdarzenie': 'Wezbranie z przekroczeniem stanów ostrzegawczych',
+            'stopien': '1', 'przebieg': 'Wzrost stanów wody w górnej Wiśle.',
+            'obszary': [{'wojewodztwo': 'małopolskie', 'opis': 'zlewnia Wisły'}]
+        }
+    ],
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Opóźnienia odpowiedzi [s] per ścieżka - do symulowania wolnych endpointów
+    delays = {}
+
+    def do_GET(self):
+        time.sleep(self.delays.get(self.path, 0))
+        payload = PAYLOADS.get(self.path)
+        if payload is None:
+            self.send_error(404)
+            return
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def run_stub_server(port=8000):
+    server = ThreadingHTTPServer(('localhost', port), StubHandler)
+    print(f"🧪 Serwer testowy IMGW: http://localhost:{port}/api/data/")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    run_stub_server(int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
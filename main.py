@@ -3,6 +3,7 @@ import requests
 import csv
 import time
 import sys
+import hydro_binlog
 from kafka import KafkaConsumer, KafkaProducer
 from kafka.errors import NoBrokersAvailable
 from datetime import datetime
@@ -82,6 +83,11 @@ def process_and_save_data(data):
     
     print(f"💾 Zapisano {len(data)} rekordów do pliku CSV")
 
+def save_to_binlog(data):
+    """Dopisuje dane do binarnego logu (alternatywa dla CSV)"""
+    saved = hydro_binlog.append_readings(data)
+    print(f"💾 Zapisano {saved} rekordów do pliku {hydro_binlog.BINLOG_FILE}")
+
 def kafka_producer():
     """Wysyła dane do Kafka"""
     if not wait_for_kafka():
@@ -99,8 +105,8 @@ def kafka_producer():
         producer.flush()
         print(f"📤 Wysłano {len(data)} rekordów do topiku '{HYDRO_TOPIC}'")
 
-def kafka_consumer():
-    """Odbiera dane z Kafka i zapisuje do CSV"""
+def kafka_consumer(save=process_and_save_data):
+    """Odbiera dane z Kafka i zapisuje je funkcją save (domyślnie do CSV)"""
     if not wait_for_kafka():
         print("❌ Nie można połączyć się z brokerem Kafka")
         return
@@ -119,7 +125,7 @@ def kafka_consumer():
             data = message.value
             if isinstance(data, list):
                 print(f"✅ Odebrano {len(data)} rekordów")
-                process_and_save_data(data)
+                save(data)
             else:
                 print("⚠️ Otrzymano dane w nieoczekiwanym formacie:", type(data))
         except json.JSONDecodeError as e:
@@ -128,14 +134,18 @@ def kafka_consumer():
             print(f"❌ Inny błąd: {e}")
 
 if __name__ == '__main__':
-    init_csv_file()
-
     # Tryb działania z linii poleceń: python script.py producer
     mode = sys.argv[1] if len(sys.argv) > 1 else 'consumer'
 
+    # Log binarny jest append-only, więc nie czyścimy pliku CSV w tym trybie
+    if mode != 'binlog':
+        init_csv_file()
+
     if mode == 'producer':
         kafka_producer()
     elif mode == 'consumer':
         kafka_consumer()
+    elif mode == 'binlog':
+        kafka_consumer(save=save_to_binlog)
     else:
-        print("⚠️ Nieznany tryb. Użyj 'producer' lub 'consumer'.")
+        print("⚠️ Nieznany tryb. Użyj 'producer', 'consumer' lub 'binlog'.")
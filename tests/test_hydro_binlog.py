@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+import hydro_binlog
+
+
+def reading(code, stan, stan_data='2024-05-20 10:00:00', przelyw='1.1'):
+    return {
+        'kod_stacji': code, 'nazwa_stacji': f'Stacja {code}',
+        'lon': '21.0', 'lat': '52.2',
+        'stan': stan, 'stan_data': stan_data, 'przelyw': przelyw,
+    }
+
+
+def test_round_trip_uses_dictionary_next_to_log(tmp_path):
+    binlog = str(tmp_path / 'a.bin')
+    hydro_binlog.append_readings([reading('1', '520'), reading('2', None)], binlog)
+    hydro_binlog.append_readings([reading('1', '530', '2024-05-20 11:00:00')], binlog)
+
+    assert (tmp_path / 'a.json').exists()
+    records = hydro_binlog.open_binlog(binlog)
+    assert len(records) == 3
+    assert hydro_binlog.level_stats(records)['Max'] == '530.00'
+
+    rows = {r['kod_stacji']: r for r in hydro_binlog.read_latest_rows(binlog)}
+    assert rows['1']['stan'] == '530'
+    assert rows['1']['przeplyw'] == '1.1'
+    assert rows['1']['stan_data'] == '2024-05-20 11:00:00'
+    assert rows['2']['stan'] is None
+
+
+def test_missing_level_does_not_hide_last_valid_reading(tmp_path):
+    binlog = str(tmp_path / 'a.bin')
+    hydro_binlog.append_readings([reading('1', '200')], binlog)
+    hydro_binlog.append_readings([reading('1', None, '2024-05-20 11:00:00')], binlog)
+    rows = hydro_binlog.read_latest_rows(binlog)
+    assert rows[0]['stan'] == '200'
+
+
+def test_records_without_measurement_time_are_skipped(tmp_path):
+    binlog = str(tmp_path / 'a.bin')
+    written = hydro_binlog.append_readings([reading('1', '200', None), reading('2', '300')], binlog)
+    assert written == 1
+    assert len(hydro_binlog.open_binlog(binlog)) == 1
+
+
+def test_partial_trailing_record_is_ignored_and_cut_off(tmp_path):
+    binlog = tmp_path / 'a.bin'
+    hydro_binlog.append_readings([reading('1', '200')], str(binlog))
+    with open(binlog, 'ab') as f:
+        f.write(b'\x00' * 7)
+    assert len(hydro_binlog.open_binlog(str(binlog))) == 1
+
+    hydro_binlog.append_readings([reading('2', '300', '2024-05-20 11:00:00')], str(binlog))
+    assert binlog.stat().st_size == 2 * hydro_binlog.RECORD_DTYPE.itemsize
+    rows = {r['kod_stacji']: r for r in hydro_binlog.read_latest_rows(str(binlog))}
+    assert rows['1']['stan'] == '200'
+    assert rows['2']['stan'] == '300'
+    assert rows['2']['stan_data'] == '2024-05-20 11:00:00'
+
+
+def test_timestamps_do_not_depend_on_process_timezone(tmp_path, monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip('brak time.tzset')
+    binlog = str(tmp_path / 'a.bin')
+    monkeypatch.setenv('TZ', 'UTC')
+    time.tzset()
+    hydro_binlog.append_readings([reading('1', '200', '2024-05-20 10:00:00')], binlog)
+    monkeypatch.setenv('TZ', 'Europe/Warsaw')
+    time.tzset()
+    try:
+        assert hydro_binlog.read_latest_rows(binlog)[0]['stan_data'] == '2024-05-20 10:00:00'
+    finally:
+        monkeypatch.undo()
+        time.tzset()
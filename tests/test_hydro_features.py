@@ -0,0 +1,176 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('kafka')
+import hydro_features
+from kafka import TopicPartition
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GEOJSON_FILE = os.path.join(REPO_DIR, hydro_features.GEOJSON_FILE)
+
+
+@pytest.fixture(scope='module')
+def regions():
+    return hydro_features.load_regions(GEOJSON_FILE)
+
+
+def region_name(regions, lon, lat):
+    i = hydro_features.find_region(lon, lat, regions)
+    return regions[i][0] if i >= 0 else None
+
+
+def hydro(code, hour, stan, lon='21.0', lat='52.2', day=20):
+    return {
+        'kod_stacji': code, 'lon': lon, 'lat': lat, 'stan': str(stan),
+        'stan_data': f'2024-05-{day} {hour:02d}:00:00',
+    }
+
+
+def meteo(code, minute, opad, lon='21.0', lat='52.2'):
+    return {
+        'kod_stacji': code, 'lon': lon, 'lat': lat, 'opad_10min': str(opad),
+        'opad_10min_data': f'2024-05-20 11:{minute:02d}:00',
+    }
+
+
+def test_ring_buffer_window_and_wraparound():
+    buffers = hydro_features.RingBuffers(capacity=3)
+    i = buffers.add_series()
+    for t, v in [(0, 1), (3600, 2), (7200, 3), (10800, 4)]:
+        assert buffers.push(i, t, v)
+    assert not buffers.push(i, 10800, 5)
+    assert buffers.window(i, 3600).tolist() == [3, 4]
+    assert buffers.window(i, 10**6).tolist() == [2, 3, 4]
+
+
+def test_point_in_polygon(regions):
+    assert region_name(regions, 21.01, 52.23) == 'Mazowieckie'
+    assert region_name(regions, 19.94, 50.06) == 'Małopolskie'
+    assert region_name(regions, 16.93, 52.41) == 'Wielkopolskie'
+    # Hel leży tuż poza zgrubnym konturem - przypisanie do najbliższego województwa
+    assert region_name(regions, 18.80, 54.60) == 'Pomorskie'
+    assert region_name(regions, 15.0, 56.0) is None
+
+
+def test_station_and_region_features():
+    store = hydro_features.FeatureStore(GEOJSON_FILE)
+    for hour, stan in [(9, 190), (10, 200), (11, 220)]:
+        store.update_hydro([hydro('a', hour, stan)])
+    assert store.update_hydro([hydro('a', 11, 999)]) == 0
+    store.update_meteo([meteo('m', 0, 0.4), meteo('m', 10, 0.6)])
+
+    features = store.station_features('a')
+    assert features['stan'] == 220
+    assert features['delta_1h'] == 20
+    assert features['delta_24h'] == 30
+    assert features['mean_6h'] == pytest.approx(610 / 3)
+    assert features['opad_1h'] == pytest.approx(1.0)
+
+    region = store.region_features('Mazowieckie')
+    assert region['liczba_stacji'] == 1
+    assert region['stan_max'] == 220
+    assert region['opad_24h'] == pytest.approx(1.0)
+
+
+def test_stale_series_leave_region_aggregates():
+    store = hydro_features.FeatureStore(GEOJSON_FILE)
+    store.update_hydro([hydro('stara', 10, 500, day=17)])
+    store.update_meteo([meteo('m', 0, 5.0)])
+    store.update_hydro([hydro('nowa', 10, 200)])
+
+    region = store.region_features('Mazowieckie')
+    assert region['liczba_stacji'] == 1
+    assert region['stan_max'] == 200
+    assert region['opad_24h'] == pytest.approx(5.0)
+
+    # Dwa dni później deszczomierz i stacja 'nowa' też są nieaktualne
+    store.update_hydro([hydro('najnowsza', 12, 300, day=22)])
+    region = store.region_features('Mazowieckie')
+    assert region['liczba_stacji'] == 1
+    assert region['stan_mean'] == 300
+    assert np.isnan(region['opad_24h'])
+    assert np.isnan(store.station_features('najnowsza')['opad_24h'])
+
+
+def test_export_replaces_files(tmp_path):
+    store = hydro_features.FeatureStore(GEOJSON_FILE)
+    store.update_hydro([hydro('a', 10, 200)])
+
+    npz_file = str(tmp_path / 'cechy.npz')
+    store.export(npz_file)
+    with np.load(npz_file) as exported:
+        assert exported['station_codes'].tolist() == ['a']
+        assert exported['station_matrix'].shape == (1, len(hydro_features.STATION_FEATURES))
+
+    parquet_file = str(tmp_path / 'cechy.parquet')
+    store.export(parquet_file)
+    stations = hydro_features.pd.read_parquet(parquet_file)
+    regions = hydro_features.pd.read_parquet(str(tmp_path / 'cechy_regions.parquet'))
+    assert stations['aktualizacja'].iloc[0] == regions['aktualizacja'].iloc[0]
+    assert sorted(os.listdir(tmp_path)) == ['cechy.npz', 'cechy.parquet', 'cechy_regions.parquet']
+
+
+class FakeConsumer:
+    """Minimalny konsument Kafki: offsety okna i końcowe per partycja"""
+
+    def __init__(self, window_offsets, end_offsets):
+        self.window_offsets = window_offsets
+        self.ends = end_offsets
+        self.seeks = {}
+
+    def offsets_for_times(self, timestamps):
+        return {
+            tp: None if self.window_offsets.get(tp) is None else SimpleNamespace(offset=self.window_offsets[tp])
+            for tp in timestamps
+        }
+
+    def seek(self, tp, offset):
+        self.seeks[tp] = offset
+
+    def seek_to_end(self, tp):
+        self.seeks[tp] = self.ends[tp]
+
+    def end_offsets(self, partitions):
+        return {tp: self.ends[tp] for tp in partitions}
+
+
+class Message:
+    def __init__(self, topic, offset, partition=0):
+        self.topic, self.offset, self.partition = topic, offset, partition
+
+
+def test_seek_to_window_moves_empty_partitions_to_end():
+    hydro_tp = TopicPartition(hydro_features.HYDRO_TOPIC, 0)
+    meteo_tp = TopicPartition(hydro_features.METEO_TOPIC, 0)
+    consumer = FakeConsumer({hydro_tp: 40, meteo_tp: None}, {hydro_tp: 50, meteo_tp: 7})
+
+    starts = hydro_features.seek_to_window(consumer, [hydro_tp, meteo_tp])
+    assert starts == {hydro_tp: 40, meteo_tp: None}
+    assert consumer.seeks == {hydro_tp: 40, meteo_tp: 7}
+
+
+def test_replay_picks_up_topic_created_later():
+    hydro_tp = TopicPartition(hydro_features.HYDRO_TOPIC, 0)
+    meteo_tp = TopicPartition(hydro_features.METEO_TOPIC, 0)
+    consumer = FakeConsumer({hydro_tp: 40, meteo_tp: 0}, {hydro_tp: 42, meteo_tp: 3})
+    replay = hydro_features.WindowReplay(consumer)
+
+    # Topik meteo jeszcze nie istnieje - przydzielona tylko partycja hydro
+    replay.on_partitions_assigned([hydro_tp])
+    assert consumer.seeks == {hydro_tp: 40}
+    assert replay.replaying
+    replay.processed(Message(hydro_features.HYDRO_TOPIC, 40))
+    assert replay.replaying
+    replay.processed(Message(hydro_features.HYDRO_TOPIC, 41))
+    assert not replay.replaying
+
+    # Producent utworzył topik meteo - rebalans z obiema partycjami
+    replay.on_partitions_revoked([hydro_tp])
+    consumer.seeks.clear()
+    replay.on_partitions_assigned([hydro_tp, meteo_tp])
+    assert consumer.seeks == {hydro_tp: 42, meteo_tp: 0}
+    assert replay.replay_until == {meteo_tp: 3}
@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('kafka')
+import imgw_hydro_producer
+import imgw_stub_server
+
+
+def start_stub(handler=imgw_stub_server.StubHandler):
+    server = ThreadingHTTPServer(('localhost', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def base_url():
+    server = start_stub()
+    yield f'http://localhost:{server.server_port}/api/data/'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    session = imgw_hydro_producer.create_session()
+    yield session
+    session.close()
+
+
+def fetch_all(session, base_url):
+    sources = list(imgw_hydro_producer.SOURCES)
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        return imgw_hydro_producer.fetch_sources(session, executor, sources, base_url)
+
+
+def test_fetch_sources_returns_normalized_records(session, base_url):
+    results = fetch_all(session, base_url)
+
+    assert set(results) == set(imgw_hydro_producer.SOURCES)
+    assert results['hydro'][0]['przelyw'] == '402.5'
+    assert results['synop'][0] == {
+        'kod_stacji': '12375', 'nazwa_stacji': 'Warszawa',
+        'pomiar_data': '2024-05-20 09:00:00', 'temperatura': 17.4,
+        'suma_opadu': 2.1, 'wilgotnosc_wzgledna': 71.2, 'cisnienie': 1008.3,
+    }
+    assert results['meteo'][0]['opad_10min'] == 0.4
+    assert results['meteo'][0]['lat'] == 52.1628
+    assert results['warnings'][0]['wojewodztwa'] == ['małopolskie']
+    assert results['warnings'][0]['prawdopodobienstwo'] == 80.0
+
+
+def test_unknown_endpoint_gives_empty_result(session, base_url, capsys):
+    assert imgw_hydro_producer.fetch_source(session, 'hydro', base_url + 'brak/') == []
+    assert base_url + 'brak/hydro2/' in capsys.readouterr().out
+
+
+def test_cycle_takes_as_long_as_slowest_endpoint(session):
+    class SlowStubHandler(imgw_stub_server.StubHandler):
+        delays = {
+            '/api/data/hydro2/': 0.2,
+            '/api/data/synop/': 0.4,
+            '/api/data/meteo/': 0.6,
+            '/api/data/warningshydro/': 0.8,
+        }
+
+    server = start_stub(SlowStubHandler)
+    try:
+        start = time.monotonic()
+        results = fetch_all(session, f'http://localhost:{server.server_port}/api/data/')
+        elapsed = time.monotonic() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert all(results.values())
+    # Suma opóźnień to 2.0 s, najwolniejszy endpoint - 0.8 s
+    assert 0.8 <= elapsed < 1.4
+
+
+def test_due_sources_follow_intervals():
+    next_poll = {name: 0.0 for name in imgw_hydro_producer.SOURCES}
+    due_sources = imgw_hydro_producer.due_sources
+    assert due_sources(next_poll, 100.0) == list(imgw_hydro_producer.SOURCES)
+    assert due_sources(next_poll, 699.0) == []
+    assert due_sources(next_poll, 700.0) == ['hydro', 'meteo']
+    assert due_sources(next_poll, 1000.0) == ['warnings']
+    assert due_sources(next_poll, 3700.0) == ['hydro', 'synop', 'meteo', 'warnings']